@@ -1,9 +1,9 @@
 from iqoptionapi.stable_api import IQ_Option
 import time
-from configobj import ConfigObj
-import json, sys
+from configuracao import carregar_config
+import sys
 from datetime import datetime, timedelta
-from catalogador import catag
+from catalogador import catag, VERDE, VERMELHA, DOJI
 from tabulate import tabulate
 from colorama import init, Fore, Back
 
@@ -36,13 +36,15 @@ print(yellow + '****************************************************************
 
 
 ### CRIANDO ARQUIVO DE CONFIGURAÇÃO ####
-config = ConfigObj('config.txt')
+config = carregar_config()
 email = config['LOGIN']['email']
 senha = config['LOGIN']['senha']
 tipo = config['AJUSTES']['tipo']
 valor_entrada = float(config['AJUSTES']['valor_entrada'])
 stop_win = float(config['AJUSTES']['stop_win'])
 stop_loss = float(config['AJUSTES']['stop_loss'])
+limite_win = abs(stop_win)
+limite_loss = -abs(stop_loss)
 lucro_total = 0
 stop = True
 
@@ -113,7 +115,7 @@ API.change_balance(conta)
 ### Função para checar stop win e loss
 def check_stop():
     global stop,lucro_total
-    if lucro_total <= float('-'+str(abs(stop_loss))):
+    if lucro_total <= limite_loss:
         stop = False
         print(red+'\n#########################')
         print(red+'STOP LOSS BATIDO ',str(cifrao),str(lucro_total))
@@ -121,7 +123,7 @@ def check_stop():
         sys.exit()
         
 
-    if lucro_total >= float(abs(stop_win)):
+    if lucro_total >= limite_win:
         stop = False
         print(green+'\n#########################')
         print(green+'STOP WIN BATIDO ',str(cifrao),str(lucro_total))
@@ -131,35 +133,36 @@ def check_stop():
 def payout(par):
     profit = API.get_all_profit()
     all_asset = API.get_all_open_time()
+    profit_par = profit.get(par, {})
 
-    try:
-        if all_asset['binary'][par]['open']:
-            if profit[par]['binary']> 0:
-                binary = round(profit[par]['binary'],2) * 100
-        else:
-            binary  = 0
-    except:
-        binary = 0
-
-    try:
-        if all_asset['turbo'][par]['open']:
-            if profit[par]['turbo']> 0:
-                turbo = round(profit[par]['turbo'],2) * 100
-        else:
-            turbo  = 0
-    except:
-        turbo = 0
+    binary = 0
+    if all_asset.get('binary', {}).get(par, {}).get('open') and profit_par.get('binary', 0) > 0:
+        binary = round(profit_par['binary'],2) * 100
+
+    turbo = 0
+    if all_asset.get('turbo', {}).get(par, {}).get('open') and profit_par.get('turbo', 0) > 0:
+        turbo = round(profit_par['turbo'],2) * 100
 
-    try:
-        if all_asset['digital'][par]['open']:
+    digital = 0
+    if all_asset.get('digital', {}).get(par, {}).get('open'):
+        try:
             digital = API.get_digital_payout(par)
-        else:
-            digital  = 0
-    except:
-        digital = 0
+        except KeyError:
+            digital = 0
 
     return binary, turbo, digital
 
+### Função que estima a expiração da ordem: a corretora expira na primeira virada de minuto ###
+### com pelo menos 30s de distância da compra, somando os minutos restantes da expiração ###
+def expiracao_ordem(timestamp, exp):
+    return -(-(timestamp + 30) // 60) * 60 + (exp - 1) * 60
+
+### Funções de compra e de checagem de resultado para cada tipo de operação ###
+OPERACOES = {
+    'digital': (API.buy_digital_spot_v2, API.check_win_digital_v2),
+    'binary': (lambda ativo, entrada, direcao, exp: API.buy(entrada, ativo, direcao, exp), API.check_win_v4),
+}
+
 ### Função abrir ordem e checar resultado ###
 def compra(ativo,valor_entrada,direcao,exp,tipo):
     global stop,lucro_total, nivel_soros, niveis_soros, valor_soros, lucro_op_atual
@@ -179,14 +182,14 @@ def compra(ativo,valor_entrada,direcao,exp,tipo):
     else:
         entrada = valor_entrada
 
+    comprar, check_win = OPERACOES.get(tipo, OPERACOES['binary'])
+
     for i in range(martingale + 1):
 
         if stop == True:
         
-            if tipo == 'digital':
-                check, id = API.buy_digital_spot_v2(ativo,entrada,direcao,exp)
-            else:
-                check, id = API.buy(entrada,ativo,direcao,exp)
+            inicio = timestamp_corretora()
+            check, id = comprar(ativo,entrada,direcao,exp)
 
 
             if check:
@@ -196,9 +199,12 @@ def compra(ativo,valor_entrada,direcao,exp,tipo):
                     print(yellow + '\n>>'+white+' Ordem aberta para gale',str(i),'\n'+yellow+'>>'+white+' Par:',ativo,'\n'+yellow+'>> '+white+'Timeframe:',exp,'\n'+yellow+'>>'+white+' Entrada de:',cifrao,entrada)
 
 
+                ### A ordem não fecha antes da expiração, só consulta o resultado perto dela ###
+                time.sleep(max(expiracao_ordem(inicio, exp) - timestamp_corretora() - 2, 0))
+
                 while True:
                     time.sleep(0.1)
-                    status , resultado = API.check_win_digital_v2(id) if tipo == 'digital' else API.check_win_v4(id)
+                    status , resultado = check_win(id)
 
                     if status:
 
@@ -255,6 +261,36 @@ def compra(ativo,valor_entrada,direcao,exp,tipo):
             nivel_soros = 0
             lucro_op_atual = 0
 
+### Direção da MHI indexada pela máscara das 3 velas (bit = 1 quando a vela é verde) ###
+### Maioria verde entra para put, maioria vermelha entra para call ###
+MHI_DIRECAO = ('call', 'call', 'call', 'put', 'call', 'put', 'put', 'put')
+
+### Tempo máximo de cada espera, para reler o horário da corretora durante esperas longas ###
+INTERVALO_MAXIMO = 30
+
+### Função que calcula quantos segundos faltam para o segundo 59 do minuto de entrada ###
+### minuto: minuto do ciclo em que a análise é feita | ciclo: duração do ciclo em minutos ###
+def segundos_ate_entrada(timestamp, minuto, ciclo):
+    espera = (minuto * 60 + 59 - timestamp) % (ciclo * 60)
+
+    if espera > ciclo * 60 - 1:
+        return 0
+
+    return espera
+
+### Diferença entre o relógio da corretora e o do computador, ressincronizada a cada minuto ###
+sincronia = {'diferenca': 0, 'atualizado': 0}
+
+### Função que estima o horário da corretora pelo relógio local ###
+def timestamp_corretora():
+    agora = time.time()
+
+    if agora - sincronia['atualizado'] >= 60:
+        sincronia['diferenca'] = API.get_server_timestamp() - agora
+        sincronia['atualizado'] = agora
+
+    return agora + sincronia['diferenca']
+
 ### Fução que busca hora da corretora ###
 def horario():
     x = API.get_server_timestamp()
@@ -263,10 +299,7 @@ def horario():
     return now
 
 def medias(velas):
-    soma = 0
-    for i in velas:
-        soma += i['close']
-    media = soma / velas_medias
+    media = sum(vela['close'] for vela in velas) / len(velas)
 
     if media > velas[-1]['close']:
         tendencia = 'put'
@@ -275,98 +308,33 @@ def medias(velas):
 
     return tendencia
 
-### Função de análise MHI   
-def estrategia_mhi():
-    global tipo
+### Cor da vela indexada por (open < close) - (open > close): 0 doji, 1 verde, -1 vermelha ###
+CORES_VELA = (DOJI, VERDE, VERMELHA)
 
-    if tipo == 'automatico':
-        binary, turbo, digital = payout(ativo)
-        print(binary, turbo, digital )
-        if digital > turbo:
-            print( 'Suas entradas serão realizadas nas digitais')
-            tipo = 'digital'
-        elif turbo > digital:
-            print( 'Suas entradas serão realizadas nas binárias')
-            tipo = 'binary'
-        else:
-            print(' Par fechado, escolha outro')
-            sys.exit()
-
-
-    
-    while True:
-        time.sleep(0.1)
+### Função que retorna a cor da vela ###
+def cor_vela(vela):
+    return CORES_VELA[(vela['open'] < vela['close']) - (vela['open'] > vela['close'])]
 
-        ### Horario do computador ###
-        #minutos = float(datetime.now().strftime('%M.%S')[1:])
+### Função que define a direção da MHI pela maioria das 3 últimas velas ###
+def sinal_mhi(velas):
+    cores = [cor_vela(vela) for vela in velas[-3:]]
+    mascara = (cores[0] == VERDE) << 2 | (cores[1] == VERDE) << 1 | (cores[2] == VERDE)
 
-        ### horario da iqoption ###
-        minutos = float(datetime.fromtimestamp(API.get_server_timestamp()).strftime('%M.%S')[1:])
+    direcao = False if DOJI in cores else MHI_DIRECAO[mascara]
 
-        entrar = True if (minutos >= 4.59 and minutos <= 5.00) or minutos >= 9.59 else False
+    return direcao, cores
 
-        print('Aguardando Horário de entrada ' ,minutos, end='\r')
-        
-
-        if entrar:
-            print('\n>> Iniciando análise da estratégia MHI')
+### Função que define a direção das Torres Gêmeas pela vela de referência ###
+def sinal_torres(velas):
+    cores = [cor_vela(velas[-4])]
 
-            direcao = False
+    direcao = 'call' if cores[0] == VERDE else 'put' if cores[0] == VERMELHA else False
 
-            timeframe = 60
-            qnt_velas = 3
+    return direcao, cores
 
-
-            if analise_medias == 'S':
-                velas = API.get_candles(ativo, timeframe, velas_medias, time.time())
-                tendencia = medias(velas)
-
-            else:
-                velas = API.get_candles(ativo, timeframe, qnt_velas, time.time())
-
-
-            velas[-1] = 'Verde' if velas[-1]['open'] < velas[-1]['close'] else 'Vermelha' if velas[-1]['open'] > velas[-1]['close'] else 'Doji'
-            velas[-2] = 'Verde' if velas[-2]['open'] < velas[-2]['close'] else 'Vermelha' if velas[-2]['open'] > velas[-2]['close'] else 'Doji'
-            velas[-3] = 'Verde' if velas[-3]['open'] < velas[-3]['close'] else 'Vermelha' if velas[-3]['open'] > velas[-3]['close'] else 'Doji'
-
-
-            cores = velas[-3] ,velas[-2] ,velas[-1] 
-
-            if cores.count('Verde') > cores.count('Vermelha') and cores.count('Doji') == 0: direcao = 'put'
-            if cores.count('Verde') < cores.count('Vermelha') and cores.count('Doji') == 0: direcao = 'call'
-
-            if analise_medias =='S':
-                if direcao == tendencia:
-                    pass
-                else:
-                    direcao = 'abortar'
-
-
-
-            if direcao == 'put' or direcao == 'call':
-                print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] , ' - Entrada para ', direcao)
-
-
-                compra(ativo,valor_entrada,direcao,1,tipo)
-
-                   
-                print('\n')
-
-            else:
-                if direcao == 'abortar':
-                    print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] )
-                    print('Entrada abortada - Contra Tendência.')
-
-                else:
-                    print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] )
-                    print('Entrada abortada - Foi encontrado um doji na análise.')
-
-                time.sleep(2)
-
-            print('\n######################################################################\n')
-
-### Função de análise TORRES GEMEAS   
-def estrategia_torresgemeas():
+### Função que aguarda a janela de entrada, analisa as velas e abre as ordens da estratégia ###
+### minuto/ciclo: janela de entrada | timeframe/qnt_velas: velas analisadas | exp: expiração | sinal: função de análise ###
+def executar_estrategia(nome, minuto, ciclo, timeframe, qnt_velas, exp, sinal):
     global tipo
 
     if tipo == 'automatico':
@@ -383,46 +351,30 @@ def estrategia_torresgemeas():
             sys.exit()
 
 
-    
-    while True:
-        time.sleep(0.1)
-
-        ### Horario do computador ###
-        #minutos = float(datetime.now().strftime('%M.%S')[1:])
+    get_candles = API.get_candles
 
+    while True:
         ### horario da iqoption ###
-        minutos = float(datetime.fromtimestamp(API.get_server_timestamp()).strftime('%M.%S')[1:])
+        espera = segundos_ate_entrada(timestamp_corretora(), minuto, ciclo)
 
-        entrar = True if (minutos >= 3.59 and minutos <= 4.00) or (minutos >= 8.59 and minutos <= 9.00) else False
+        entrar = True if espera == 0 else False
 
-        print('Aguardando Horário de entrada ' ,minutos, end='\r')
-        
-
-        if entrar:
-            print('\n>> Iniciando análise da estratégia MHI')
+        print('Aguardando Horário de entrada ' ,round(espera),'s  ', end='\r')
 
-            direcao = False
+        if not entrar:
+            time.sleep(min(espera, INTERVALO_MAXIMO))
 
-            timeframe = 60
-            qnt_velas = 4
-
-
-            if analise_medias == 'S':
-                velas = API.get_candles(ativo, timeframe, velas_medias, time.time())
-                tendencia = medias(velas)
-
-            else:
-                velas = API.get_candles(ativo, timeframe, qnt_velas, time.time())
-
-            velas[-4] = 'Verde' if velas[-4]['open'] < velas[-4]['close'] else 'Vermelha' if velas[-4]['open'] > velas[-4]['close'] else 'Doji'
 
+        if entrar:
+            print('\n>> Iniciando análise da estratégia', nome)
 
-            cores = velas[-4]
+            velas = get_candles(ativo, timeframe, max(velas_medias, qnt_velas) if analise_medias == 'S' else qnt_velas, time.time())
 
-            if cores.count('Verde') > cores.count('Vermelha') and cores.count('Doji') == 0: direcao = 'call'
-            if cores.count('Verde') < cores.count('Vermelha') and cores.count('Doji') == 0: direcao = 'put'
+            direcao, cores = sinal(velas)
 
             if analise_medias =='S':
+                tendencia = medias(velas[-velas_medias:])
+
                 if direcao == tendencia:
                     pass
                 else:
@@ -431,121 +383,46 @@ def estrategia_torresgemeas():
 
 
             if direcao == 'put' or direcao == 'call':
-                print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] , ' - Entrada para ', direcao)
+                print('Velas: ', *cores, ' - Entrada para ', direcao)
 
 
-                compra(ativo,valor_entrada,direcao,1,tipo)
+                compra(ativo,valor_entrada,direcao,exp,tipo)
 
                    
                 print('\n')
 
             else:
                 if direcao == 'abortar':
-                    print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] )
+                    print('Velas: ', *cores)
                     print('Entrada abortada - Contra Tendência.')
 
                 else:
-                    print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] )
+                    print('Velas: ', *cores)
                     print('Entrada abortada - Foi encontrado um doji na análise.')
 
-                time.sleep(2)
-
             print('\n######################################################################\n')
 
+            ### Dorme até o fim do segundo de entrada, para não analisar a mesma janela de novo ###
+            segundo = timestamp_corretora() % 60
+            if segundo >= 59:
+                time.sleep(60 - segundo)
 
-### Função de análise mhi m5  
-def estrategia_mhi_m5():
-    global tipo
-
-    if tipo == 'automatico':
-        binary, turbo, digital = payout(ativo)
-        print(binary, turbo, digital )
-        if digital > turbo:
-            print( 'Suas entradas serão realizadas nas digitais')
-            tipo = 'digital'
-        elif turbo > digital:
-            print( 'Suas entradas serão realizadas nas binárias')
-            tipo = 'binary'
-        else:
-            print(' Par fechado, escolha outro')
-            sys.exit()
-
-
-    
-    while True:
-        time.sleep(0.1)
-
-        ### Horario do computador ###
-        #minutos = float(datetime.now().strftime('%M.%S')[1:])
-
-        ### horario da iqoption ###
-        minutos = float(datetime.fromtimestamp(API.get_server_timestamp()).strftime('%M.%S'))
-
-        entrar = True if  (minutos >= 29.59 and minutos <= 30.00) or minutos == 59.59  else False
-
-        print('Aguardando Horário de entrada ' ,minutos, end='\r')
-        
-
-        if entrar:
-            print('\n>> Iniciando análise da estratégia MHI')
-
-            direcao = False
-
-            timeframe = 300
-            qnt_velas = 3
-
-
-            if analise_medias == 'S':
-                velas = API.get_candles(ativo, timeframe, velas_medias, time.time())
-                tendencia = medias(velas)
-
-            else:
-                velas = API.get_candles(ativo, timeframe, qnt_velas, time.time())
-
-            velas[-1] = 'Verde' if velas[-1]['open'] < velas[-1]['close'] else 'Vermelha' if velas[-1]['open'] > velas[-1]['close'] else 'Doji'
-            velas[-2] = 'Verde' if velas[-2]['open'] < velas[-2]['close'] else 'Vermelha' if velas[-2]['open'] > velas[-2]['close'] else 'Doji'
-            velas[-3] = 'Verde' if velas[-3]['open'] < velas[-3]['close'] else 'Vermelha' if velas[-3]['open'] > velas[-3]['close'] else 'Doji'
-
-
-            cores = velas[-3] ,velas[-2] ,velas[-1] 
-
-            if cores.count('Verde') > cores.count('Vermelha') and cores.count('Doji') == 0: direcao = 'put'
-            if cores.count('Verde') < cores.count('Vermelha') and cores.count('Doji') == 0: direcao = 'call'
-
-            if analise_medias =='S':
-                if direcao == tendencia:
-                    pass
-                else:
-                    direcao = 'abortar'
-
-
-
-            if direcao == 'put' or direcao == 'call':
-                print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] , ' - Entrada para ', direcao)
-
-
-                compra(ativo,valor_entrada,direcao,5,tipo)
-
-                   
-                print('\n')
-
-            else:
-                if direcao == 'abortar':
-                    print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] )
-                    print('Entrada abortada - Contra Tendência.')
-
-                else:
-                    print('Velas: ',velas[-3] ,velas[-2] ,velas[-1] )
-                    print('Entrada abortada - Foi encontrado um doji na análise.')
+### Função de análise MHI   
+def estrategia_mhi():
+    executar_estrategia('MHI', 4, 5, 60, 3, 1, sinal_mhi)
 
-                time.sleep(2)
+### Função de análise TORRES GEMEAS   
+def estrategia_torresgemeas():
+    executar_estrategia('Torres Gêmeas', 3, 5, 60, 4, 1, sinal_torres)
 
-            print('\n######################################################################\n')
+### Função de análise mhi m5  
+def estrategia_mhi_m5():
+    executar_estrategia('MHI M5', 29, 30, 300, 3, 5, sinal_mhi)
 
 ### DEFININCãO INPUTS NO INICIO DO ROBÔ ###
 
 
-perfil = json.loads(json.dumps(API.get_profile_ansyc()))
+perfil = API.get_profile_ansyc()
 cifrao = str(perfil['currency_char'])
 nome = str(perfil['name'])
 
@@ -575,6 +452,8 @@ print('\n')
 
 
 ### Função para escolher estrategia ###
+estrategias = {1: estrategia_mhi, 2: estrategia_torresgemeas, 3: estrategia_mhi_m5}
+
 while True:
     estrategia = input(green+'\n>>'+ white +' Selecione a estratégia desejada:\n'+
                             green+'>>'+ white +' 1 - MHI\n'+
@@ -584,11 +463,7 @@ while True:
     
     estrategia =  int(estrategia)
 
-    if estrategia == 1:
-        break
-    if estrategia == 2:
-        break
-    if estrategia == 3:
+    if estrategia in estrategias:
         break
     else:
         print(red+'Escolha incorreta! Digite 1 a 3')
@@ -597,9 +472,4 @@ while True:
 ativo = input(green+ '\n>>'+white+' Digite o ativo que você deseja operar: ').upper()
 print('\n')
 
-if estrategia == 1:
-    estrategia_mhi()
-if estrategia == 2:
-    estrategia_torresgemeas()
-if estrategia == 3:
-    estrategia_mhi_m5()
\ No newline at end of file
+estrategias[estrategia]()
\ No newline at end of file
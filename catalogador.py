@@ -1,9 +1,13 @@
 from iqoptionapi.stable_api import IQ_Option
 import time
-from configobj import ConfigObj
-from datetime import datetime
+from configuracao import carregar_config
 from tabulate import tabulate
 
+### Cores das velas ###
+VERDE = 'Verde'
+VERMELHA = 'Vermelha'
+DOJI = 'Doji'
+
 def obter_pares_abertos(API):
     todos_os_ativos = API.get_all_open_time()
     pares = []
@@ -17,38 +21,30 @@ def obter_pares_abertos(API):
 
 def analisar_velas(velas, tipo_estrategia):
     resultados = {'doji': 0, 'win': 0, 'loss': 0, 'gale1': 0, 'gale2': 0}
+    cores = [VERDE if vela['open'] < vela['close'] else VERMELHA for vela in velas]
     for i in range(2, len(velas)):
-        minutos = float(datetime.fromtimestamp(velas[i]['from']).strftime('%M')[1:])
+        minutos = velas[i]['from'] // 60 % 10
         if tipo_estrategia == 'mhi' and (minutos == 5 or minutos == 0):
-            analisar_mhi(velas, i, resultados)
+            analisar_mhi(cores, i, resultados)
         elif tipo_estrategia == 'torres' and (minutos == 4 or minutos == 9):
-            analisar_torres(velas, i, resultados)
+            analisar_torres(cores, i, resultados)
         elif tipo_estrategia == 'mhi_m5' and (minutos == 30 or minutos == 0):
-            analisar_mhi(velas, i, resultados, timeframe=300)
+            analisar_mhi(cores, i, resultados, timeframe=300)
     return resultados
 
-def analisar_mhi(velas, i, resultados, timeframe=60):
+def analisar_mhi(cores, i, resultados, timeframe=60):
     try:
-        vela1 = 'Verde' if velas[i-3]['open'] < velas[i-3]['close'] else 'Vermelha'
-        vela2 = 'Verde' if velas[i-2]['open'] < velas[i-2]['close'] else 'Vermelha'
-        vela3 = 'Verde' if velas[i-1]['open'] < velas[i-1]['close'] else 'Vermelha'
-        direcao = 'Verde' if [vela1, vela2, vela3].count('Verde') > 1 else 'Vermelha'
-        entradas = [
-            'Verde' if velas[i+j]['open'] < velas[i+j]['close'] else 'Vermelha'
-            for j in range(3)
-        ]
+        ### Maioria de 3 velas: se as duas primeiras empatam na cor, ela é a maioria; senão a terceira decide ###
+        direcao = cores[i-3] if cores[i-3] == cores[i-2] else cores[i-1]
+        entradas = [cores[i], cores[i+1], cores[i+2]]
         resultados = atualizar_resultados(entradas, direcao, resultados)
     except:
         pass
 
-def analisar_torres(velas, i, resultados):
+def analisar_torres(cores, i, resultados):
     try:
-        vela1 = 'Verde' if velas[i-4]['open'] < velas[i-4]['close'] else 'Vermelha'
-        direcao = vela1
-        entradas = [
-            'Verde' if velas[i+j]['open'] < velas[i+j]['close'] else 'Vermelha'
-            for j in range(3)
-        ]
+        direcao = cores[i-4]
+        entradas = [cores[i], cores[i+1], cores[i+2]]
         resultados = atualizar_resultados(entradas, direcao, resultados)
     except:
         pass
@@ -81,10 +77,15 @@ def obter_resultados(API, pares):
     estrategias = ['mhi', 'torres', 'mhi_m5']
     resultados = []
 
+    velas_pares = {}
+    for par in pares:
+        velas_pares[par] = API.get_candles(par, timeframe, max(qnt_velas, qnt_velas_m5), time.time())
+
     for estrategia in estrategias:
         for par in pares:
-            velas = API.get_candles(par, timeframe, qnt_velas if estrategia != 'mhi_m5' else qnt_velas_m5, time.time())
+            velas = velas_pares[par]
             if velas is not None:
+                velas = velas[-(qnt_velas if estrategia != 'mhi_m5' else qnt_velas_m5):]
                 resultados_estrategia = analisar_velas(velas, estrategia)
                 percentuais = calcular_percentuais(resultados_estrategia)
                 resultados.append([estrategia.upper(), par] + percentuais)
@@ -92,7 +93,7 @@ def obter_resultados(API, pares):
     return resultados
 
 def catag(API):
-    config = ConfigObj('config.txt')
+    config = carregar_config()
     pares = obter_pares_abertos(API)
     resultados = obter_resultados(API, pares)
 
@@ -0,0 +1,15 @@
+import os
+from configobj import ConfigObj
+
+_cache_config = {'arquivo': None, 'mtime': 0, 'config': None}
+
+### Função que carrega o arquivo de configuração, relendo do disco só quando ele for alterado ###
+def carregar_config(arquivo='config.txt'):
+    mtime = os.path.getmtime(arquivo)
+
+    if _cache_config['arquivo'] != arquivo or _cache_config['mtime'] != mtime:
+        _cache_config['config'] = ConfigObj(arquivo)
+        _cache_config['arquivo'] = arquivo
+        _cache_config['mtime'] = mtime
+
+    return _cache_config['config']